@@ -1,6 +1,10 @@
 import argparse
 import codecs
+import collections
+import concurrent.futures
 import dataclasses
+import functools
+import hashlib
 import json
 import logging
 import os
@@ -10,9 +14,51 @@ import subprocess
 import typing
 import re
 import sys
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 logger = logging.getLogger()
 
+# Prints installed distribution name and version as JSON.
+# Runs in virtualenv python (pkg_resources for python < 3.8).
+# Name is spelled as pkg_resources (and pipdeptree) spells it.
+_METADATA_SCRIPT = '''
+import json, re, sys
+try:
+    from importlib.metadata import PackageNotFoundError, distribution
+except ImportError:
+    from pkg_resources import get_distribution
+    dist = get_distribution(sys.argv[1])
+    name, version = dist.project_name, dist.version
+else:
+    try:
+        dist = distribution(sys.argv[1])
+    except PackageNotFoundError:
+        # Older importlib.metadata does not normalize dashes.
+        dist = distribution(sys.argv[1].replace('-', '_'))
+    name = re.sub('[^A-Za-z0-9.]+', '-', dist.metadata['Name'])
+    version = dist.version
+print(json.dumps({'name': name, 'version': version}))
+'''
+
+# PyPI releases list changes only when new versions appear.
+JSON_CACHE_TTL = 24 * 60 * 60
+
+# Patterns used for every package and dependency.
+_REQ_RE = re.compile(r'^([<>!=]*)(.*)$')
+_VEREXPR_RE = re.compile(r'^([<>=]+)')
+_PKGEXPR_RE = re.compile(r'^([^<>=]+)(.*)$')
+_NORMALIZE_RE = re.compile(r'[-_.]+')
+_INSTALLED_RE = re.compile(r'^[0-9][0-9A-Za-z.!+_-]*$')
+
 
 @dataclasses.dataclass(unsafe_hash=True, order=True)
 class Dependency:
@@ -26,8 +72,9 @@ class Dependency:
         parts = (''.join(part) for part in total)
         return '%s %s' % (self.package, ','.join(parts))
 
-    @classmethod
-    def _requires(cls, requirement) -> tuple:
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _requires(requirement: str) -> tuple:
         requires, conflicts = [], []
 
         if not requirement:
@@ -36,7 +83,7 @@ class Dependency:
         # Requirement could be multiple.
         for part in requirement.split(','):
             # Separate operation and version.
-            search = re.search(r'^([<>!=]*)(.*)$', part)
+            search = _REQ_RE.search(part)
             part_op, part_ver = search.groups()
 
             # RPM does not support != in 'Requires' tag.
@@ -52,7 +99,7 @@ class Dependency:
     @classmethod
     def parse(cls, dep: dict):
         package, installed = dep['package_name'], dep['installed_version']
-        requires, conflicts = cls._requires(dep['required_version'])
+        requires, conflicts = cls._requires(dep['required_version'] or '')
         return cls(package, installed, requires, conflicts)
 
 
@@ -67,7 +114,7 @@ class Package:
 
     @property
     def expression(self):
-        if re.match(r'^[<>=]+', self.version):
+        if _VEREXPR_RE.match(self.version):
             return '%s%s' % (self.package, self.version)
         elif self.version:
             return '%s==%s' % (self.package, self.version)
@@ -75,8 +122,19 @@ class Package:
             return self.package
 
 
+def _dep_key(dep: dict) -> tuple:
+    """ Returns pipdeptree dependency identity. """
+    return dep['package_name'], dep['installed_version'], dep['required_version']
+
+
+def _normalize_name(name: str) -> str:
+    """ Returns package name comparable across spellings. """
+    return _NORMALIZE_RE.sub('-', name).lower()
+
+
 class Packetizer:
-    def __init__(self, python_path: str, names_prefix: str, index_url: str, json_url: str):
+    def __init__(self, python_path: str, names_prefix: str, index_url: str, json_url: str,
+                 jobs: int = 4):
         # Python used for RPM building hard-coded into spec.
         # Python used for package downloading and installing.
         self.system_python = self.active_python = python_path
@@ -88,6 +146,25 @@ class Packetizer:
         self.index_url = index_url
         self.json_url = json_url
 
+        # Dependencies processed concurrently.
+        self.jobs = jobs
+
+        # Keep-alive connections shared by all workers.
+        pool_size = max(16, self.jobs)
+        self.http = requests.Session()
+        self.http.mount('https://', HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size,
+            max_retries=Retry(total=3, backoff_factor=0.3)))
+
+        # Prefetches PyPI JSON while virtualenv is queried.
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.jobs)
+
+        # Virtualenv queries results (reset after installing).
+        self._deps_tree_cache = None
+        self._deps_graph = None
+        self._metadata_cache = {}
+        self._cache_lock = threading.Lock()
+
         # Where to create archives and build specs.
         self.temp = os.path.expanduser('~/rpmbuild/PYTHON/temp')
         self.venv = os.path.expanduser('~/rpmbuild/PYTHON/venv')
@@ -96,6 +173,9 @@ class Packetizer:
         self.sources = os.path.expanduser('~/rpmbuild/SOURCES')
         self.specs = os.path.expanduser('~/rpmbuild/SPECS')
 
+        # Where to cache PyPI packages releases information.
+        self.jsoncache = os.path.expanduser('~/rpmbuild/PYTHON/jsoncache')
+
         if not os.path.exists(self.temp):
             logger.info('Creating temporary: %s', self.temp)
             os.makedirs(self.temp)
@@ -116,19 +196,32 @@ class Packetizer:
 
         os.makedirs(self.sources, exist_ok=True)
         os.makedirs(self.specs, exist_ok=True)
+        os.makedirs(self.jsoncache, exist_ok=True)
+
+        # Downloaded archives digests (to skip re-downloading).
+        self.manifest = os.path.join(self.temp, '.manifest.json')
+        self._manifest = {}
+        self._manifest_lock = threading.Lock()
+        if os.path.exists(self.manifest):
+            with open(self.manifest) as fp:
+                self._manifest = json.load(fp)
 
     def packetize(self, package: str, verexpr: str, recursive: bool, exclude: str):
         logger.info('Building RPM spec for %s%s', package, verexpr)
         package = Package(package=package, version=verexpr)
+        exclude_re = re.compile(exclude, re.IGNORECASE) if exclude else None
 
         # Install requested package into virtualenv.
         self._install_package_to_venv(package)
 
+        # Fetch package releases while querying virtualenv.
+        json_future = self._executor.submit(self._fetch_package_json, package.package)
+
         # Get information about installed package.
         self._collect_package_metadata(package)
 
         # Download installed package sources.
-        self._download_package_sources(package)
+        self._download_package_sources(package, json_future.result())
 
         # Build rpm package from downloaded archive.
         self._build_package_spec(package)
@@ -136,150 +229,344 @@ class Packetizer:
         # Build also all package dependencies.
         # All dependencies installed in prepare phase.
         if recursive:
-            installed = sorted({(d.package, d.installed) for d in package.all_deps})
-            for depname, version in installed:
-                if exclude and re.search(exclude, depname, re.IGNORECASE):
-                    continue
-
-                logger.info('Building RPMs for %s==%s', depname, version)
-                dependent = Package(package=depname, version=version)
+            # Requirements may spell same package differently (Jinja2, jinja2).
+            installed = {}
+            for depname, version in sorted({(d.package, d.installed) for d in package.all_deps}):
+                installed.setdefault(_normalize_name(depname), (depname, version))
+            installed = sorted(installed.values())
+            fetch = self._fetch_package_json
+            json_futures = {depname: self._executor.submit(fetch, depname, version)
+                            for depname, version in installed
+                            if not (exclude_re and exclude_re.search(depname))}
+
+            # Pin all dependencies with single pip run (optional step).
+            # Missing requirements have '?' installed version.
+            pinned = ['%s==%s' % dep for dep in installed
+                      if dep[0] in json_futures and _INSTALLED_RE.match(dep[1])]
+            if pinned:
+                logger.info('Installing dependencies: %s packages...', len(pinned))
+                try:
+                    self._install_packages_to_venv(pinned, pinned_installed=True)
+                except subprocess.CalledProcessError:
+                    logger.warning('Installing dependencies: pinning failed', exc_info=True)
+
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                futures = {}
+                for depname, version in installed:
+                    if depname not in json_futures:
+                        continue
+                    future = executor.submit(self._process_dep, depname, version,
+                                             json_futures[depname])
+                    futures[future] = '%s==%s' % (depname, version)
+
+                failed = []
+                for future in concurrent.futures.as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception:
+                        logger.exception('Building RPMs for %s failed', futures[future])
+                        failed.append(futures[future])
+
+            if failed:
+                raise RuntimeError('Building RPMs failed for: %s' % ', '.join(sorted(failed)))
+
+    def _process_dep(self, depname: str, version: str, json_future: concurrent.futures.Future):
+        """
+            Builds RPM spec for already installed dependency.
+        """
+        logger.info('Building RPMs for %s==%s', depname, version)
+        dependent = Package(package=depname, version=version)
 
-                # Get information about installed package.
-                self._collect_package_metadata(dependent)
+        # Get information about installed package.
+        self._collect_package_metadata(dependent)
 
-                # Download installed package sources.
-                self._download_package_sources(dependent)
+        # Download installed package sources.
+        self._download_package_sources(dependent, json_future.result())
 
-                # Build rpm package from downloaded archive.
-                self._build_package_spec(dependent)
+        # Build rpm package from downloaded archive.
+        self._build_package_spec(dependent)
 
     def _parse_deps_tree(self, package: Package, deps: list):
         """
             Reads dependencies tree and fills package.
         """
+        # Index and closures are shared between packages of same tree.
+        graph = self._deps_graph
+        if graph is None or graph[0] is not deps:
+            index = {}
+            for entry in deps:
+                index.setdefault(entry['package']['package_name'], []).extend(entry['dependencies'])
+            graph = self._deps_graph = (deps, index, {}, {})
+        _, index, parsed, closures = graph
+
         # Find current package in all packages output.
-        own_deps = []
-        for entry in deps:
-            if entry['package']['package_name'] == package.package:
-                for dependency in entry['dependencies']:
-                    own_deps.append(dependency)
+        own_deps = index.get(package.package, [])
 
         # Flatify nested dependency structure.
-        all_deps, queue = [], own_deps[:]
-        while queue:
-            next_entry = queue.pop(-1)
-            all_deps.append(next_entry)
-
-            for entry in deps:
-                if entry['package']['package_name'] == next_entry['package_name']:
-                    queue.extend(entry['dependencies'])
+        all_deps = set()
+        for dep in own_deps:
+            all_deps.add(self._parse_dep(dep, parsed))
+            all_deps |= self._dep_closure(dep['package_name'], index, parsed, closures)
 
         # Make result sorted and unique.
-        package.own_deps = sorted({Dependency.parse(dep) for dep in own_deps})
-        package.all_deps = sorted({Dependency.parse(dep) for dep in all_deps})
+        package.own_deps = sorted({self._parse_dep(dep, parsed) for dep in own_deps})
+        package.all_deps = sorted(all_deps)
 
-    def _patch_spec_data(self, package: Package, lines: list):
+    @staticmethod
+    def _parse_dep(dep: dict, parsed: dict) -> Dependency:
         """
-            Changes SPEC file content.
+            Parses every distinct dependency only once.
         """
-        result = [
-            # Python path used for packages installing.
-            # This macros also used at /usr/lib/rpm macroses.
-            '%%define __python %s\n' % self.system_python,
+        key = _dep_key(dep)
+        if key not in parsed:
+            parsed[key] = Dependency.parse(dep)
+        return parsed[key]
 
-            # Package name before manipulations.
-            # Matches directory name in sources archive.
-            '%%define original_name %s\n' % package.package,
-        ]
+    def _dep_closure(self, name: str, index: dict, parsed: dict, closures: dict) -> frozenset:
+        """
+            Returns all dependencies reachable from package (memoized DFS).
+            Closures cut by dependency cycle are not memoized.
+        """
+        if name in closures:
+            return closures[name]
+
+        # Frame is [package name, dependencies iterator, closure, complete].
+        frames = collections.deque([[name, iter(index.get(name, [])), set(), True]])
+        on_stack, closure = {name}, None
+        while frames:
+            frame = frames[-1]
+            dep = next(frame[1], None)
+            if dep is None:
+                frames.pop()
+                on_stack.discard(frame[0])
+                closure = frozenset(frame[2])
+                if frame[3]:
+                    closures[frame[0]] = closure
+                if frames:
+                    frames[-1][2] |= closure
+                    frames[-1][3] = frames[-1][3] and frame[3]
+                continue
+
+            frame[2].add(self._parse_dep(dep, parsed))
+            child = dep['package_name']
+            if child in closures:
+                frame[2] |= closures[child]
+            elif child in on_stack:
+                frame[3] = False
+            else:
+                on_stack.add(child)
+                frames.append([child, iter(index.get(child, [])), set(), True])
+        return closure
+
+    def _patch_spec_data(self, package: Package, lines: typing.Iterable[str]):
+        """
+            Changes SPEC file content (yields patched lines).
+        """
+        # Python path used for packages installing.
+        # This macros also used at /usr/lib/rpm macroses.
+        yield f'%define __python {self.system_python}\n'
+
+        # Package name before manipulations.
+        # Matches directory name in sources archive.
+        yield f'%define original_name {package.package}\n'
+
+        prefix = self.prefix
 
         for line in lines:
             if '%define name' in line:
                 # Name macro will contains full name with prefix.
-                result.append('%%define name %s%s\n' % (self.prefix, package.package))
+                yield f'%define name {prefix}{package.package}\n'
 
             elif '%description' in line:
+                # Installed packages names as pip shows them.
+                names = {_normalize_name(entry['package']['package_name']):
+                         entry['package']['package_name'] for entry in self._get_deps_tree()}
+
                 # Package dependencies gets prefix.
                 for dependency in package.own_deps:
-                    # Get information about installed package.
-                    deppackage = Package(dependency.package)
-                    self._collect_package_metadata(deppackage)
-
-                    fullname = '%s%s' % (self.prefix, deppackage.package)
+                    depname = names.get(_normalize_name(dependency.package), dependency.package)
+                    fullname = f'{prefix}{depname}'
                     if not dependency.requires and not dependency.conflicts:
-                        result.append('Requires: %s\n' % fullname)
+                        yield f'Requires: {fullname}\n'
                     else:
                         for require in dependency.requires:
-                            result.append('Requires: %s %s %s\n' % (fullname, require[0], require[1]))
+                            yield f'Requires: {fullname} {require[0]} {require[1]}\n'
                         for conflict in dependency.conflicts:
-                            result.append('Conflicts: %s == %s\n' % (fullname, conflict[1]))
+                            yield f'Conflicts: {fullname} == {conflict[1]}\n'
 
                 # Dependencies goes before description.
-                result.append(line)
+                yield line
 
             elif '%setup' in line:
-                result.append('%setup -n %{original_name}-%{unmangled_version}')
+                yield '%setup -n %{original_name}-%{unmangled_version}'
 
             elif 'Source0:' in line:
                 # Package archive may be in .tar.gz, in .zip, in .tar.xz.
                 # But setuptools bdist_rpm writes .tar.gz suffix.
-                result.append('Source0: %s\n' % os.path.basename(package.archive))
+                yield f'Source0: {os.path.basename(package.archive)}\n'
 
             else:
-                result.append(line)
-        return result
+                yield line
 
     def _install_package_to_venv(self, package: Package):
         """
             Installs pip package expression into virtual environment.
         """
         logger.info('Installing package: %s%s...', package.package, package.version)
+        self._install_packages_to_venv([package.expression])
+
+    def _install_packages_to_venv(self, expressions: typing.List[str],
+                                  pinned_installed: bool = False):
+        """
+            Installs pip packages expressions into virtual environment at once.
+            Pinned installed versions leave virtualenv (and caches) unchanged.
+        """
         check_output([self.active_python, '-m', 'pip', 'install',
-                      '-i', self.index_url, package.expression])
+                      '-i', self.index_url] + expressions)
+        if pinned_installed:
+            return
+
+        # Virtualenv state changed.
+        with self._cache_lock:
+            self._deps_tree_cache = None
+            self._metadata_cache.clear()
+
+    def _get_deps_tree(self) -> list:
+        """
+            Executes pipdeptree once and caches parsed output.
+        """
+        with self._cache_lock:
+            if self._deps_tree_cache is None:
+                output = check_output([self.active_python, '-m', 'pipdeptree', '--json'],
+                                      text=False, stderr=subprocess.DEVNULL)
+                self._deps_tree_cache = json_loads(output)
+            return self._deps_tree_cache
+
+    def _get_installed_metadata(self, name: str) -> dict:
+        """
+            Reads installed package name and version once per package.
+        """
+        with self._cache_lock:
+            metadata = self._metadata_cache.get(name)
+        if metadata is None:
+            output = check_output([self.active_python, '-c', _METADATA_SCRIPT, name],
+                                  stderr=subprocess.DEVNULL)
+            metadata = json.loads(output)
+            with self._cache_lock:
+                self._metadata_cache[name] = metadata
+        return metadata
 
     def _collect_package_metadata(self, package: Package):
         """
-            Executes pip show to detect package name and version.
+            Reads installed metadata to detect package name and version.
             Executes pipdeptree to detect package dependencies.
         """
         logger.info('Querying version: %s...', package.package)
-        output = check_output([self.active_python, '-m', 'pip', 'show', package.package])
-        package.package = re.search(r'Name: ([^\s]+)', output).group(1)
-        package.version = re.search(r'Version: ([^\s]+)', output).group(1)
+        metadata = self._get_installed_metadata(package.package)
+        package.package, package.version = metadata['name'], metadata['version']
         logger.info('Querying version: %s installed', package.expression)
 
         logger.info('Querying dependencies: %s...', package.expression)
-        output = check_output([self.active_python, '-m', 'pipdeptree', '--json'])
-        self._parse_deps_tree(package, json.loads(output))
+        self._parse_deps_tree(package, self._get_deps_tree())
         for dependency in package.own_deps:
             logger.info('Querying dependencies: own: %s', dependency)
         for dependency in package.all_deps:
             logger.info('Querying dependencies: all: %s', dependency)
 
-    def _download_package_sources(self, package: Package):
+    def _fetch_package_json(self, name: str, version: str = '') -> dict:
+        """
+            Fetches package releases information from PyPI.
+            Cached data is used when it has requested version
+            (or while fresh when no version requested).
+        """
+        url = self.json_url % name
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+        path = os.path.join(self.jsoncache, '%s.json' % key)
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as fp:
+                data = json.load(fp)
+            if version:
+                if version in data['releases']:
+                    return data
+            elif time.time() - os.path.getmtime(path) < JSON_CACHE_TTL:
+                return data
+
+        response = self.http.get(url)
+        response.raise_for_status()
+        data = response.json()
+        with open('%s.%s' % (path, threading.get_ident()), 'w', encoding='utf-8') as fp:
+            json.dump(data, fp)
+        os.replace(fp.name, path)
+        return data
+
+    def _download_package_sources(self, package: Package, json_data: dict = None):
         """
             Downloads installed package version sources archive.
         """
         logger.info('Querying sources: %s...', package.expression)
-        output = check_output([self.active_python, '-m', 'pip', 'show', package.package])
-        package.package = re.search(r'Name: ([^\s]+)', output).group(1)
-        package.version = re.search(r'Version: ([^\s]+)', output).group(1)
-
-        data = requests.get(self.json_url % package.package).json()
+        data = json_data or self._fetch_package_json(package.package, package.version)
+        if package.version not in data['releases']:
+            # Prefetched data may be older than installed version.
+            data = self._fetch_package_json(package.package, package.version)
         meta = next(d for d in data['releases'][package.version] if d['packagetype'] == 'sdist')
         logger.info('Querying sources: %s found', meta['url'])
 
-        logger.info('Downloading sources: %s', package.package)
-        content = requests.get(meta['url']).content
         target = os.path.join(self.sources, meta['filename'])
-        with open(target, 'wb') as fp:
-            fp.write(content)
+        if self._is_archive_cached(target, meta):
+            logger.info('Downloading sources: %s cached', target)
+            downloaded = False
+        else:
+            logger.info('Downloading sources: %s', package.package)
+            with self.http.get(meta['url'], stream=True) as response:
+                response.raise_for_status()
+                with open(target, 'wb') as fp:
+                    shutil.copyfileobj(response.raw, fp, length=1024 * 1024)
+            self._update_manifest(target, meta)
+            logger.info('Downloading sources: %s downloaded', target)
+            downloaded = True
         package.archive = target
-        logger.info('Downloading sources: %s downloaded', package.archive)
 
-        logger.info('Unpacking sources: %s...', package.archive)
-        shutil.unpack_archive(os.path.join(self.sources, package.archive), self.temp)
         package.sources = os.path.join(self.temp, '%s-%s' % (package.package, package.version))
-        logger.info('Unpacking sources: %s unpacked', package.sources)
+        if not downloaded and os.path.isdir(package.sources) and os.listdir(package.sources):
+            logger.info('Unpacking sources: %s cached', package.sources)
+        else:
+            logger.info('Unpacking sources: %s...', package.archive)
+            shutil.unpack_archive(package.archive, self.temp)
+            logger.info('Unpacking sources: %s unpacked', package.sources)
+
+    def _is_archive_cached(self, target: str, meta: dict) -> bool:
+        """
+            Checks downloaded archive matches PyPI size and digest.
+            Index without size or digest is never cached.
+        """
+        size, sha256 = meta.get('size'), meta.get('digests', {}).get('sha256')
+        if size is None or sha256 is None:
+            return False
+        if not os.path.exists(target) or os.path.getsize(target) != size:
+            return False
+        with self._manifest_lock:
+            return self._manifest.get(meta['filename']) == sha256
+
+    def _update_manifest(self, target: str, meta: dict):
+        """
+            Verifies downloaded archive digest and records it in manifest.
+            Index without digest is not verified.
+        """
+        sha256 = meta.get('digests', {}).get('sha256')
+        if sha256 is None:
+            return
+
+        digest = hashlib.sha256()
+        with open(target, 'rb') as fp:
+            for chunk in iter(lambda: fp.read(1024 * 1024), b''):
+                digest.update(chunk)
+        if digest.hexdigest() != sha256:
+            raise ValueError('Archive %s sha256 mismatch' % target)
+
+        with self._manifest_lock:
+            self._manifest[meta['filename']] = sha256
+            with open(self.manifest, 'w') as fp:
+                json.dump(self._manifest, fp, indent=2, sort_keys=True)
 
     def _build_package_spec(self, package: Package):
         """
@@ -296,21 +583,33 @@ class Packetizer:
         logger.info('Building SPEC file: %s built', spec)
 
         logger.info('Preparing SPEC file: %s...', spec)
-        with codecs.open(spec, 'r', 'utf-8') as fp:
-            lines = fp.readlines()
-        lines = self._patch_spec_data(package, lines)
+        target = os.path.join(self.specs, '%s%s.spec' % (self.prefix, package.package))
+        partial = '%s.%s' % (target, threading.get_ident())
+        try:
+            with codecs.open(spec, 'r', 'utf-8') as in_fp, \
+                    codecs.open(partial, 'w', 'utf-8') as out_fp:
+                out_fp.writelines(self._patch_spec_data(package, in_fp))
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        os.replace(partial, target)
+        logger.info('Preparing SPEC file: %s prepared', target)
+
+
+def check_output(command: typing.List[str], text: bool = True, **kwargs):
+    """ Calls command and returns output (stderr goes to terminal by default). """
+    if text:
+        kwargs['encoding'] = 'utf-8'
+    return subprocess.check_output(command, **kwargs)
 
-        spec = os.path.join(self.specs, '%s%s.spec' % (self.prefix, package.package))
-        with codecs.open(spec, 'w', 'utf-8') as fp:
-            fp.write(''.join(lines))
-        logger.info('Preparing SPEC file: %s prepared', spec)
 
-
-def check_output(command: typing.List[str], **kwargs):
-    """ Calls command and returns output. """
-    kwargs['encoding'] = 'utf-8'
-    kwargs['stderr'] = subprocess.PIPE
-    return subprocess.check_output(command, **kwargs)
+def positive_int(value: str) -> int:
+    """ Parses positive integer command line argument. """
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError('%s is not a positive integer' % value)
+    return number
 
 
 def main():
@@ -350,14 +649,21 @@ def main():
         help='pip json url',
         default='https://pypi.org/pypi/%s/json'
     )
+    parser.add_argument(
+        '--jobs',
+        help='dependencies processed concurrently',
+        type=positive_int,
+        default=4,
+    )
     args = parser.parse_args()
 
     # Parse package expression (package name and version expression).
-    search = re.search(r'^([^<>=]+)(.*)$', args.package)
+    search = _PKGEXPR_RE.search(args.package)
     package, verexpr = search.group(1), search.group(2)
 
     # Start working on package.
-    packetizer = Packetizer(sys.executable, args.prefix, args.pip_index_url, args.pip_json_url)
+    packetizer = Packetizer(sys.executable, args.prefix, args.pip_index_url, args.pip_json_url,
+                            args.jobs)
     packetizer.packetize(package, verexpr, args.recursive, args.exclude)
 
 